@@ -0,0 +1,140 @@
+"""
+Compare webhook throughput and latency between the default and fast runtime profiles.
+
+Starts the API server once per profile and posts Telegram updates to the webhook. The
+updates are plain text messages that match no handler, so the numbers cover HTTP
+parsing, JSON decoding and update dispatch, not calls to the Telegram API.
+
+The default profile leaves uvicorn on its `auto` settings, which already use uvloop and
+httptools when they are installed, so on a full install this mostly compares orjson
+against json. The event loop choice the profile makes for `cli serve` is not measured.
+
+    poetry run python benchmarks/webhook.py --requests 20000 --concurrency 64
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import aiohttp
+
+PROFILES = ["default", "fast"]
+
+
+def make_update(update_id: int) -> bytes:
+    return json.dumps(
+        {
+            "update_id": update_id,
+            "message": {
+                "message_id": update_id,
+                "date": 1700000000,
+                "chat": {"id": 1000 + update_id % 50, "type": "private", "first_name": "Bench"},
+                "from": {"id": 1000 + update_id % 50, "is_bot": False, "first_name": "Bench"},
+                "text": "Chicken Rice",
+            },
+        }
+    ).encode()
+
+
+async def wait_until_ready(url: str, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            try:
+                async with session.get(url) as response:
+                    if response.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not start")
+
+
+async def run_load(url: str, requests: int, concurrency: int) -> tuple[float, list[float]]:
+    bodies = [make_update(i) for i in range(requests)]
+    latencies: list[float] = []
+    next_request = iter(range(requests))
+
+    async def worker(session: aiohttp.ClientSession) -> None:
+        for i in next_request:
+            start = time.perf_counter()
+            async with session.post(
+                url, data=bodies[i], headers={"Content-Type": "application/json"}
+            ) as response:
+                await response.read()
+                if response.status != 200:
+                    raise RuntimeError(f"Webhook returned {response.status}")
+            latencies.append(time.perf_counter() - start)
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(session) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return elapsed, latencies
+
+
+def benchmark(profile: str, args: argparse.Namespace) -> dict[str, float]:
+    env = os.environ | {
+        "RUNTIME_PROFILE": profile,
+        "PORT": str(args.port),
+        "BOT_TOKEN": os.environ.get("BOT_TOKEN", "0:benchmark"),
+        "DATABASE_URL": os.environ.get("DATABASE_URL", "sqlite://"),
+        "SECRET_TOKEN": "benchmark",
+        "WEBHOOK_HOST": "localhost",
+        # Keep admission control from throttling the synthetic users
+        "USER_RATE_LIMIT": "1000000",
+        "USER_RATE_BURST": "1000000",
+    }
+    server = subprocess.Popen(  # noqa: S603
+        [sys.executable, "-c", "from tgbot.infrastructure.api import main; main()"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        asyncio.run(wait_until_ready(f"{base_url}/"))
+        # Warm up imports, connection pools and caches before measuring
+        asyncio.run(run_load(f"{base_url}/benchmark/", min(args.requests, 500), args.concurrency))
+        elapsed, latencies = asyncio.run(
+            run_load(f"{base_url}/benchmark/", args.requests, args.concurrency)
+        )
+    finally:
+        server.terminate()
+        server.wait()
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        "throughput": args.requests / elapsed,
+        "p50": quantiles[49] * 1000,
+        "p99": quantiles[98] * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--port", type=int, default=8799)
+    args = parser.parse_args()
+
+    results = {profile: benchmark(profile, args) for profile in PROFILES}
+
+    print(f"{'profile':<10}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for profile, result in results.items():
+        print(
+            f"{profile:<10}{result['throughput']:>10.0f}"
+            f"{result['p50']:>10.2f}{result['p99']:>10.2f}"
+        )
+    speedup = results["fast"]["throughput"] / results["default"]["throughput"]
+    print(f"\nfast/default throughput: {speedup:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,33 @@
 import os
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 import telebot
 import uvicorn
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse
 
-from ..bot import bot
+from ..bot import admission, bot, jio_events, loop_watchdog, telegram_metadata
 from ..config import settings
+from ..runtime import json_loads_for, uvicorn_options
+from .jios import router as jios_router
+
+json_loads = json_loads_for(settings.runtime_profile)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    loop_watchdog.start()
+    await telegram_metadata.warm_up()
+    yield
+    # End open event streams so they do not hold up shutdown
+    jio_events.close()
+    await loop_watchdog.stop()
+    await bot.close_session()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+app.include_router(jios_router)
 
 
 @app.get("/")
@@ -14,11 +35,37 @@ def read_root() -> dict[str, str]:
     return {"Hello": "World"}
 
 
+@app.get("/health")
+async def health() -> JSONResponse:
+    """
+    Report event loop lag and admission counters, failing when the instance is too
+    overloaded to serve
+    """
+    lag = loop_watchdog.percentiles()
+    healthy = lag["p99"] < settings.loop_lag_unhealthy_ms
+    return JSONResponse(
+        {
+            "status": "ok" if healthy else "overloaded",
+            "loop_lag_ms": lag,
+            "admission": admission.stats(),
+        },
+        status_code=200 if healthy else 503,
+    )
+
+
 @app.post(f"/{settings.secret_token}/")
-async def process_webhook(update: dict[str, object]) -> None:
+async def process_webhook(request: Request) -> None:
     """
     Process webhook calls
     """
+    # Decode the raw body directly, with orjson in the fast runtime profile. Both json
+    # and orjson raise a ValueError subclass on malformed input.
+    try:
+        update = json_loads(await request.body())
+    except ValueError:
+        raise HTTPException(status_code=422, detail="Body is not valid JSON") from None
+    if not isinstance(update, dict):
+        raise HTTPException(status_code=422, detail="Body must be a JSON object")
     if update:
         update = telebot.types.Update.de_json(update)
         await bot.process_new_updates([update])
@@ -35,6 +82,10 @@ def main() -> None:
         host="0.0.0.0",  # noqa: S104
         port=port,
         reload=False,  # Disable reload in production
+        # uvicorn waits for open connections before running the lifespan shutdown, so
+        # cut off event streams that are still open after this many seconds
+        timeout_graceful_shutdown=5,
+        **uvicorn_options(settings.runtime_profile),
     )
 
 
@@ -0,0 +1,226 @@
+import json
+import secrets
+from bisect import bisect_right
+from collections.abc import AsyncIterator
+
+from fastapi import APIRouter, Cookie, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from starlette.background import BackgroundTask
+
+from ..bot import JioSubscription, get_jio_orders_version, jio_events, jio_orders
+from ..config import settings
+
+_bearer = HTTPBearer(auto_error=False)
+
+
+def _check_api_token(token: str | None) -> None:
+    if not settings.api_token:
+        raise HTTPException(status_code=403, detail="The jio API is disabled")
+    if token is None or not secrets.compare_digest(token.encode(), settings.api_token.encode()):
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid or missing API token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+def require_api_token(
+    credentials: HTTPAuthorizationCredentials | None = Depends(_bearer),
+) -> None:
+    """Only let through requests carrying `Authorization: Bearer <API_TOKEN>`."""
+    _check_api_token(credentials.credentials if credentials else None)
+
+
+def require_stream_token(
+    credentials: HTTPAuthorizationCredentials | None = Depends(_bearer),
+    token: str | None = Query(None, description="API token, for clients that cannot set headers"),
+    api_token: str | None = Cookie(None),
+) -> None:
+    """
+    Like `require_api_token`, but also take the token from the `token` query parameter
+    or the `api_token` cookie, since browser EventSource clients cannot send headers.
+    """
+    if credentials is not None:
+        _check_api_token(credentials.credentials)
+    else:
+        _check_api_token(token or api_token)
+
+
+router = APIRouter(prefix="/jios", tags=["jios"])
+
+# Serialized jios keyed by id, stored together with the version they were rendered at
+_jio_bytes_cache: dict[int, tuple[int, bytes]] = {}
+
+
+def _forget_closed_jio(jio_id: int) -> None:
+    if jio_id not in jio_orders:
+        _jio_bytes_cache.pop(jio_id, None)
+
+
+# Drop the bytes of a jio as soon as it closes, whichever endpoints are in use
+jio_events.add_listener(_forget_closed_jio)
+
+
+class _PageCache:
+    """Serialized list pages keyed by (cursor, limit), valid for one collection version."""
+
+    max_entries = 256
+
+    def __init__(self) -> None:
+        self.version = 0
+        self.pages: dict[tuple[int | None, int], bytes] = {}
+
+    def get(self, version: int, cursor: int | None, limit: int) -> bytes | None:
+        if self.version != version:
+            self.pages.clear()
+            self.version = version
+        return self.pages.get((cursor, limit))
+
+    def set(self, cursor: int | None, limit: int, body: bytes) -> None:
+        if len(self.pages) >= self.max_entries:
+            self.pages.clear()
+        self.pages[(cursor, limit)] = body
+
+
+_page_cache = _PageCache()
+
+# Idle streams get a comment line this often so proxies keep them open and dead
+# connections are noticed
+_STREAM_HEARTBEAT_SECONDS = 15.0
+
+
+def _serialize_jio(jio_id: int, jio: dict[str, object]) -> bytes:
+    """Render a jio as compact JSON, reusing the cached bytes while its version holds."""
+    version = jio.get("version", 0)
+    cached = _jio_bytes_cache.get(jio_id)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    body = json.dumps(
+        {
+            "id": jio_id,
+            "name": jio["name"],
+            "creator": jio["creator"],
+            "creator_id": jio["creator_id"],
+            "items": jio["items"],
+            "participants": jio["participants"],
+            "created_at": jio["created_at"],
+            "group_count": len(jio.get("group_messages", [])),  # type: ignore[arg-type]
+            "version": version,
+        },
+        ensure_ascii=False,
+        separators=(",", ":"),
+    ).encode()
+    _jio_bytes_cache[jio_id] = (version, body)  # type: ignore[assignment]
+    return body
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    """Check the If-None-Match header against a strong ETag."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+
+def _json_response(body: bytes, etag: str) -> Response:
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": "no-cache"},
+    )
+
+
+@router.get("", dependencies=[Depends(require_api_token)])
+async def list_jios(
+    request: Request,
+    cursor: int | None = Query(None, description="Return jios with an id greater than this"),
+    limit: int = Query(50, ge=1, le=200),
+) -> Response:
+    """
+    List live jios ordered by id, paginated by passing back `next_cursor`
+    """
+    version = get_jio_orders_version()
+    # Each page is a different representation, so the ETag covers the page too
+    etag = f'"jios-{version}-{"" if cursor is None else cursor}-{limit}"'
+    if _etag_matches(request, etag):
+        return _not_modified(etag)
+
+    body = _page_cache.get(version, cursor, limit)
+    if body is None:
+        ids = sorted(jio_orders)
+        start = 0 if cursor is None else bisect_right(ids, cursor)
+        page = ids[start : start + limit]
+        next_cursor = page[-1] if start + limit < len(ids) else None
+        body = (
+            b'{"jios":['
+            + b",".join(_serialize_jio(jio_id, jio_orders[jio_id]) for jio_id in page)
+            + b'],"next_cursor":'
+            + json.dumps(next_cursor).encode()
+            + b"}"
+        )
+        _page_cache.set(cursor, limit, body)
+
+    return _json_response(body, etag)
+
+
+async def _jio_event_stream(subscription: JioSubscription) -> AsyncIterator[bytes]:
+    """Render pending jio changes as Server-Sent Events carrying full jio snapshots."""
+    yield b"retry: 3000\n\n"
+    while (changes := await subscription.wait(_STREAM_HEARTBEAT_SECONDS)) is not None:
+        jio_ids, overflowed = changes
+        if overflowed:
+            # Too far behind to replay: ask the client to refetch GET /jios
+            yield b"event: resync\ndata: {}\n\n"
+        elif not jio_ids:
+            yield b": keep-alive\n\n"
+        for jio_id in jio_ids:
+            jio = jio_orders.get(jio_id)
+            if jio is None:
+                yield b'event: jio_closed\ndata: {"id":%d}\n\n' % jio_id
+            else:
+                yield b"event: jio\ndata: " + _serialize_jio(jio_id, jio) + b"\n\n"
+
+
+async def _unsubscribe(subscription: JioSubscription) -> None:
+    jio_events.unsubscribe(subscription)
+
+
+@router.get("/events", dependencies=[Depends(require_stream_token)])
+async def stream_jio_events() -> StreamingResponse:
+    """
+    Push jio changes as Server-Sent Events
+    """
+    subscription = jio_events.subscribe()
+    if subscription is None:
+        raise HTTPException(status_code=503, detail="Too many subscribers or shutting down")
+
+    return StreamingResponse(
+        _jio_event_stream(subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # Runs once the stream ends, including when the client disconnects
+        background=BackgroundTask(_unsubscribe, subscription),
+    )
+
+
+@router.get("/{jio_id}", dependencies=[Depends(require_api_token)])
+async def get_jio(request: Request, jio_id: int) -> Response:
+    """
+    Return a single jio
+    """
+    jio = jio_orders.get(jio_id)
+    if jio is None:
+        raise HTTPException(status_code=404, detail="Jio not found")
+
+    etag = f'"jio-{jio_id}-{jio.get("version", 0)}"'
+    if _etag_matches(request, etag):
+        return _not_modified(etag)
+
+    return _json_response(_serialize_jio(jio_id, jio), etag)
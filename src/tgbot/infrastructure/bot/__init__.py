@@ -1,5 +1,32 @@
-from .bot import bot
+from .admission import AdmissionMiddleware
+from .bot import (
+    admission,
+    bot,
+    get_jio_orders_version,
+    jio_orders,
+    loop_watchdog,
+    mark_jio_changed,
+    telegram_metadata,
+)
+from .events import JioEventHub, JioSubscription, jio_events
+from .metadata import AsyncTTLCache, TelegramMetadata
+from .suggestions import ItemSuggestions
+from .watchdog import LoopWatchdog
 
 __all__ = [
+    "AdmissionMiddleware",
+    "AsyncTTLCache",
+    "ItemSuggestions",
+    "JioEventHub",
+    "JioSubscription",
+    "LoopWatchdog",
+    "TelegramMetadata",
+    "admission",
     "bot",
+    "get_jio_orders_version",
+    "jio_events",
+    "jio_orders",
+    "loop_watchdog",
+    "mark_jio_changed",
+    "telegram_metadata",
 ]
@@ -0,0 +1,168 @@
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Any
+
+from telebot.asyncio_handler_backends import BaseMiddleware, CancelUpdate
+
+# Priority classes, lower runs first
+PRIORITY_INTERACTIVE = 0  # callback and inline queries, answered while the user waits
+PRIORITY_ORDER = 1  # regular messages, including order input
+PRIORITY_DIAGNOSTIC = 2  # admin and diagnostic commands that scan every jio
+
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_ORDER: "order",
+    PRIORITY_DIAGNOSTIC: "diagnostic",
+}
+
+DIAGNOSTIC_COMMANDS = frozenset({"debug", "list_jios", "test_inline", "bot_info", "profile"})
+
+
+class PriorityGate:
+    """
+    Limit concurrently running handlers, admitting waiters by priority.
+
+    Waiters of the same priority are admitted in arrival order.
+    """
+
+    def __init__(self, max_concurrent: int) -> None:
+        self.max_concurrent = max_concurrent
+        self.running = 0
+        self._waiters: list[tuple[int, int, asyncio.Future[None]]] = []
+        self._sequence = itertools.count()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self, priority: int) -> None:
+        if self.running < self.max_concurrent and not self._waiters:
+            self.running += 1
+            return
+
+        waiter: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), waiter))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just before the cancellation, pass it on
+                self.release()
+            else:
+                self._waiters = [entry for entry in self._waiters if entry[2] is not waiter]
+                heapq.heapify(self._waiters)
+            raise
+
+    def release(self) -> None:
+        while self._waiters:
+            _, _, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                # Hand the slot straight to the next waiter
+                waiter.set_result(None)
+                return
+        self.running -= 1
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float, now: float) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated_at = now
+
+    def take(self, now: float) -> bool:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+# telebot ships without type hints, so BaseMiddleware is Any to mypy
+class AdmissionMiddleware(BaseMiddleware):  # type: ignore[misc]
+    """
+    Schedule updates by priority class and shed work when the bot is overloaded.
+
+    Handlers run through a `PriorityGate`. Once `overload_queue_depth` updates are queued
+    the bot counts as overloaded: diagnostic commands are dropped and every user is
+    throttled by a token bucket.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = 32,
+        overload_queue_depth: int = 16,
+        user_rate: float = 1.0,
+        user_burst: float = 5,
+        max_tracked_users: int = 10_000,
+    ) -> None:
+        super().__init__()
+        self.update_types = ["message", "callback_query", "inline_query"]
+        self.gate = PriorityGate(max_concurrent)
+        self.overload_queue_depth = overload_queue_depth
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.max_tracked_users = max_tracked_users
+        self._buckets: dict[int, TokenBucket] = {}
+        self.admitted = dict.fromkeys(PRIORITY_NAMES.values(), 0)
+        self.shed = dict.fromkeys(PRIORITY_NAMES.values(), 0)
+        self.throttled = dict.fromkeys(PRIORITY_NAMES.values(), 0)
+
+    @property
+    def overloaded(self) -> bool:
+        return self.gate.waiting >= self.overload_queue_depth
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "running": self.gate.running,
+            "waiting": self.gate.waiting,
+            "overloaded": self.overloaded,
+            "admitted": dict(self.admitted),
+            "shed": dict(self.shed),
+            "throttled": dict(self.throttled),
+        }
+
+    @staticmethod
+    def classify(update: Any) -> int:
+        if not hasattr(update, "message_id"):
+            return PRIORITY_INTERACTIVE
+        text = update.text or ""
+        if text.startswith("/"):
+            command = text[1:].split(maxsplit=1)[:1]
+            if command and command[0].split("@", 1)[0] in DIAGNOSTIC_COMMANDS:
+                return PRIORITY_DIAGNOSTIC
+        return PRIORITY_ORDER
+
+    def _allow_user(self, user_id: int) -> bool:
+        now = time.monotonic()
+        bucket = self._buckets.get(user_id)
+        if bucket is None:
+            if len(self._buckets) >= self.max_tracked_users:
+                # Idle buckets have refilled anyway, forget them
+                self._buckets.clear()
+            bucket = self._buckets[user_id] = TokenBucket(self.user_rate, self.user_burst, now)
+        return bucket.take(now)
+
+    async def pre_process(self, message: Any, data: dict[str, Any]) -> CancelUpdate | None:
+        priority = self.classify(message)
+        name = PRIORITY_NAMES[priority]
+
+        # Buckets are always drained so that they reflect recent activity once overload hits
+        allowed = self._allow_user(message.from_user.id)
+        if self.overloaded:
+            if priority == PRIORITY_DIAGNOSTIC:
+                self.shed[name] += 1
+                return CancelUpdate()
+            if not allowed:
+                self.throttled[name] += 1
+                return CancelUpdate()
+
+        await self.gate.acquire(priority)
+        self.admitted[name] += 1
+        return None
+
+    async def post_process(self, message: Any, data: dict[str, Any], exception: Any) -> None:
+        self.gate.release()
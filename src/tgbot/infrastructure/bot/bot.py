@@ -1,4 +1,7 @@
+import asyncio
 import logging
+import math
+import sys
 
 import telebot
 from telebot.async_telebot import AsyncTeleBot
@@ -9,14 +12,40 @@ from telebot.types import (
     CallbackQuery, 
     InlineQuery,
     InlineQueryResultArticle,
-    InputTextMessageContent
+    InputTextMessageContent,
+    KeyboardButton,
+    ReplyKeyboardMarkup,
+    ReplyKeyboardRemove
 )
 
 from ..config import settings
+from .admission import AdmissionMiddleware
+from .events import jio_events
+from .metadata import TelegramMetadata
+from .orders import MAX_ITEMS_PER_MESSAGE, MAX_QUANTITY, format_item, parse_order_lines
+from .profiling import ProfileAlreadyRunningError, capture_profile
+from .suggestions import ItemSuggestions
+from .watchdog import LoopWatchdog
 
 bot = AsyncTeleBot(settings.bot_token)
 telebot.logger.setLevel(logging.INFO)
 
+loop_watchdog = LoopWatchdog(__file__, threshold=settings.loop_lag_threshold_ms / 1000)
+
+admission = AdmissionMiddleware(
+    max_concurrent=settings.max_concurrent_updates,
+    overload_queue_depth=settings.overload_queue_depth,
+    user_rate=settings.user_rate_limit,
+    user_burst=settings.user_rate_burst,
+)
+bot.setup_middleware(admission)
+
+telegram_metadata = TelegramMetadata(bot)
+
+# Item names ordered so far, favouring recent orders, globally and per user (both the
+# jio creator and the person ordering)
+item_suggestions = ItemSuggestions()
+
 # Custom in-memory state storage
 user_states = {}
 
@@ -25,9 +54,51 @@ class BotStates:
     WAITING_FOR_JIO_NAME = "waiting_for_jio_name"
     WAITING_FOR_ITEM = "waiting_for_item"
 
+# Limits for /profile captures, in seconds
+DEFAULT_PROFILE_SECONDS = 10
+MAX_PROFILE_SECONDS = 120
+
+# Strong references to running background tasks so they are not garbage collected
+background_tasks: set[asyncio.Task[None]] = set()
+
 # In-memory storage for Jio orders
 jio_orders = {}
 
+class VersionCounter:
+    """Monotonic counter, kept in an object so it can be bumped without `global`."""
+    
+    def __init__(self) -> None:
+        self.value = 0
+    
+    def next(self) -> int:
+        self.value += 1
+        return self.value
+
+# Global mutation counter for jio_orders. Every change stamps the touched jio with the
+# next value, so versions never repeat even when a jio id is reused after closing.
+jio_orders_version = VersionCounter()
+
+def mark_jio_changed(jio_id: int) -> None:
+    """Record a mutation of a jio (including its removal)."""
+    version = jio_orders_version.next()
+    if jio_id in jio_orders:
+        jio_orders[jio_id]["version"] = version
+    jio_events.publish(jio_id)
+
+def get_jio_orders_version() -> int:
+    """Return the version of the most recent change to any jio."""
+    return jio_orders_version.value
+
+def item_suggestion_markup(jio_id: int) -> ReplyKeyboardMarkup | None:
+    """One-tap buttons for the items currently most ordered through this jio's creator."""
+    names = item_suggestions.suggest(jio_orders[jio_id]["creator_id"], limit=6)
+    if not names:
+        return None
+    
+    markup = ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=True, row_width=2)
+    markup.add(*(KeyboardButton(name) for name in names))
+    return markup
+
 @bot.message_handler(commands=["start"])
 async def start(message: Message) -> None:
     """Start the bot and ask for supper jio name."""
@@ -64,6 +135,7 @@ async def handle_jio_name(message: Message) -> None:
         "created_at": message.date,
         "group_messages": []
     }
+    mark_jio_changed(jio_id)
     
     # Clear the state
     user_states.pop(user_id, None)
@@ -118,7 +190,9 @@ async def add_item_command(message: Message) -> None:
     
     await bot.reply_to(
         message,
-        f"What food item would you like to add to '{jio_orders[jio_id]['name']}'?"
+        f"What food item would you like to add to '{jio_orders[jio_id]['name']}'?\n\n"
+        f"To add several at once, send one per line, e.g. '2x Chicken Rice'.",
+        reply_markup=item_suggestion_markup(jio_id)
     )
 
 @bot.message_handler(commands=["view_jio"])
@@ -149,7 +223,7 @@ async def view_jio_command(message: Message) -> None:
         if jio['items']:
             response += "   📝 Current items:\n"
             for item in jio['items']:
-                response += f"      • {item['user']}: {item['item']}\n"
+                response += f"      • {item['user']}: {format_item(item)}\n"
         
         response += "\n"
     
@@ -207,7 +281,9 @@ async def handle_jio_selection(call):
         await bot.answer_callback_query(call.id, f"Selected: {jio['name']}")
         await bot.send_message(
             call.from_user.id,
-            f"What food item would you like to add to '{jio['name']}'?"
+            f"What food item would you like to add to '{jio['name']}'?\n\n"
+            f"To add several at once, send one per line, e.g. '2x Chicken Rice'.",
+            reply_markup=item_suggestion_markup(jio_id)
         )
         
     except Exception as e:
@@ -222,12 +298,27 @@ async def inline_query_handler(inline_query):
         logging.info(f"Received inline query: {inline_query.query}")
         logging.info(f"From user: {inline_query.from_user.id}")
         
-        if not jio_orders:
+        # Item completions from the user's own orders and jios only, so item names
+        # never leak between chats
+        suggestions = []
+        if inline_query.query.strip():
+            own_items = item_suggestions.suggest(
+                inline_query.from_user.id, inline_query.query, include_global=False
+            )
+            for i, name in enumerate(own_items):
+                suggestions.append(InlineQueryResultArticle(
+                    id=f"item_{i}",
+                    title=f"🍕 {name}",
+                    description="From your orders",
+                    input_message_content=InputTextMessageContent(message_text=name)
+                ))
+        
+        if not jio_orders and not suggestions:
             logging.info("No jios available for inline query")
-            await bot.answer_inline_query(inline_query.id, [])
+            await bot.answer_inline_query(inline_query.id, [], is_personal=True)
             return
         
-        results = []
+        results = suggestions
         
         for jio_id, jio in jio_orders.items():
             logging.info(f"Processing jio {jio_id}: {jio['name']}")
@@ -241,7 +332,7 @@ async def inline_query_handler(inline_query):
             if jio['items']:
                 summary += "📝 **Current Orders:**\n"
                 for item in jio['items']:
-                    summary += f"• {item['user']}: {item['item']}\n"
+                    summary += f"• {item['user']}: {format_item(item)}\n"
             else:
                 summary += "📝 No orders yet. Be the first to order!\n"
             
@@ -253,8 +344,6 @@ async def inline_query_handler(inline_query):
             ))
             
             # Create the inline result using proper Telegram types
-            from telebot.types import InlineQueryResultArticle, InputTextMessageContent
-            
             result = InlineQueryResultArticle(
                 id=f"jio_{jio_id}",
                 title=f"🍽️ {jio['name']}",
@@ -270,7 +359,8 @@ async def inline_query_handler(inline_query):
             logging.info(f"Added result for jio {jio_id}")
         
         logging.info(f"Sending {len(results)} results for inline query")
-        await bot.answer_inline_query(inline_query.id, results)
+        # Completions differ per user, so Telegram must not share cached results
+        await bot.answer_inline_query(inline_query.id, results, is_personal=True)
         logging.info("Inline query answered successfully")
         
     except Exception as e:
@@ -300,6 +390,7 @@ async def handle_add_order_callback(call):
             inline_entry = {"inline_message_id": call.inline_message_id}
             if inline_entry not in jio.setdefault("group_messages", []):
                 jio["group_messages"].append(inline_entry)
+                mark_jio_changed(jio_id)
                 logging.info(f"✅ Recorded inline message for jio {jio_id}: {call.inline_message_id}")
         
         # Send instructions to the user
@@ -313,9 +404,10 @@ async def handle_add_order_callback(call):
             await bot.send_message(
                 call.from_user.id,
                 f"🍽️ **Add Order to '{jio['name']}'**\n\n"
-                f"Please send me the food item you'd like to order.\n"
-                f"Example: 'Chicken Rice' or 'Beef Noodles'",
-                parse_mode="Markdown"
+                f"Please send me the food items you'd like to order, one per line.\n"
+                f"Example:\n2x Chicken Rice\nBeef Noodles",
+                parse_mode="Markdown",
+                reply_markup=item_suggestion_markup(jio_id)
             )
             
             # Set state for this user
@@ -352,7 +444,7 @@ async def update_all_jio_messages(jio_id):
     if jio['items']:
         summary += "📝 **Current Orders:**\n"
         for item in jio['items']:
-            summary += f"• {item['user']}: {item['item']}\n"
+            summary += f"• {item['user']}: {format_item(item)}\n"
     else:
         summary += "📝 No orders yet. Be the first to order!\n"
     
@@ -388,6 +480,28 @@ async def update_all_jio_messages(jio_id):
         except Exception as e:
             logging.error(f"Failed to update group message {group_msg}: {e}")
 
+def order_input_error(
+    parsed_items: list[tuple[int, str]],
+    invalid_lines: list[str],
+    out_of_range_lines: list[str],
+) -> str | None:
+    """Return the reply explaining why an order message was rejected, if it was."""
+    errors = []
+    if invalid_lines:
+        errors.append("❌ Could not read these lines:\n" + "\n".join(f"• {line}" for line in invalid_lines))
+    if out_of_range_lines:
+        errors.append(
+            f"❌ Quantities must be between 1 and {MAX_QUANTITY}:\n"
+            + "\n".join(f"• {line}" for line in out_of_range_lines)
+        )
+    if errors:
+        return "\n\n".join(errors)
+    if not parsed_items:
+        return "Please provide a valid food item name."
+    if len(parsed_items) > MAX_ITEMS_PER_MESSAGE:
+        return f"❌ You can add at most {MAX_ITEMS_PER_MESSAGE} items per message."
+    return None
+
 @bot.message_handler(func=lambda message: user_states.get(message.from_user.id, {}).get("state") == BotStates.WAITING_FOR_ITEM)
 async def handle_item_input(message: Message) -> None:
     """Handle when user inputs a food item."""
@@ -399,33 +513,55 @@ async def handle_item_input(message: Message) -> None:
         return
     
     jio_id = user_state["jio_id"]
-    item_name = message.text.strip()
+    if jio_id not in jio_orders:
+        await bot.reply_to(message, "❌ This jio has been closed.")
+        return
+    
+    # Parse the whole message first so a batch is added completely or not at all
+    parsed_items, invalid_lines, out_of_range_lines = parse_order_lines(message.text or "")
     
-    if not item_name:
-        await bot.reply_to(message, "Please provide a valid food item name.")
+    error = order_input_error(parsed_items, invalid_lines, out_of_range_lines)
+    if error:
+        # Keep waiting for items so the user can simply resend
+        user_states[user_id] = user_state
+        await bot.reply_to(message, error)
         return
     
-    # Add the item to the jio
+    # Add the items to the jio
     jio = jio_orders[jio_id]
-    jio["items"].append({
-        "user": message.from_user.first_name,
-        "item": item_name,
-        "added_at": message.date
-    })
+    jio["items"].extend(
+        {
+            "user": message.from_user.first_name,
+            "item": item_name,
+            "quantity": quantity,
+            "added_at": message.date
+        }
+        for quantity, item_name in parsed_items
+    )
     
     # Add user to participants if not already there
     if message.from_user.first_name not in jio["participants"]:
         jio["participants"].append(message.from_user.first_name)
+    mark_jio_changed(jio_id)
     
-    # Update all group messages
+    for _, item_name in parsed_items:
+        item_suggestions.record((jio["creator_id"], user_id), item_name)
+    
+    # Update all group messages once for the whole batch
     await update_all_jio_messages(jio_id)
     
+    if len(parsed_items) == 1:
+        added = f"'{format_item(jio['items'][-1])}'"
+    else:
+        added = f"{len(parsed_items)} items"
+    
     await bot.reply_to(
         message,
-        f"✅ Added '{item_name}' to '{jio['name']}'!\n\n"
+        f"✅ Added {added} to '{jio['name']}'!\n\n"
         f"Current items: {len(jio['items'])}\n"
         f"Participants: {len(jio['participants'])}\n\n"
-        f"📤 All group messages have been updated!"
+        f"📤 All group messages have been updated!",
+        reply_markup=ReplyKeyboardRemove()
     )
 
 @bot.message_handler(commands=["help"])
@@ -435,12 +571,13 @@ async def help_command(message: Message) -> None:
 
 **Commands:**
 • `/start` - Create a new supper jio
-• `/add_item` - Add food items to your jio
+• `/add_item` - Add food items to your jio (one per line, e.g. `2x Chicken Rice`)
 • `/view_jio` - View your current jio status
 • `/share_jio` - Learn how to share your jio
 • `/list_jios` - List all available jios
 • `/close_jio` - Close your jio
 • `/debug` - Show debug information
+• `/profile` - Capture a CPU and memory profile (admins only)
 • `/test_inline` - Test inline query functionality
 • `/bot_info` - Show bot configuration and status
 • `/help` - Show this help message
@@ -517,6 +654,7 @@ async def close_jio_command(message: Message) -> None:
     
     # Remove the jio
     del jio_orders[jio_id]
+    mark_jio_changed(jio_id)
     
     await bot.reply_to(
         message,
@@ -547,6 +685,7 @@ async def handle_close_jio_callback(call):
         
         # Remove the jio
         del jio_orders[jio_id]
+        mark_jio_changed(jio_id)
         
         await bot.answer_callback_query(call.id, f"✅ Closed: {jio_name}")
         await bot.edit_message_text(
@@ -590,6 +729,57 @@ async def debug_command(message: Message) -> None:
     
     await bot.reply_to(message, debug_text, parse_mode="Markdown")
 
+async def send_profile(chat_id: int, reply_to_message_id: int, seconds: float) -> None:
+    """Capture a profile and send the results as files."""
+    try:
+        report, raw_stats = await capture_profile(seconds, sys.modules[__name__])
+    except ProfileAlreadyRunningError:
+        await bot.send_message(chat_id, "❌ A profile is already running, try again later.")
+        return
+    except Exception as e:
+        logging.error(f"Error capturing profile: {e}")
+        await bot.send_message(chat_id, f"❌ Error capturing profile: {e}")
+        return
+
+    await bot.send_document(
+        chat_id,
+        report.encode(),
+        reply_to_message_id=reply_to_message_id,
+        visible_file_name="profile.txt",
+    )
+    await bot.send_document(
+        chat_id,
+        raw_stats,
+        visible_file_name="profile.prof",
+        caption="Raw CPU stats, open with `python -m pstats profile.prof`",
+        parse_mode="Markdown",
+    )
+
+@bot.message_handler(commands=["profile"])
+async def profile_command(message: Message) -> None:
+    """Capture a CPU and memory profile of the running bot (admins only)."""
+    if message.from_user.id not in settings.admin_ids:
+        await bot.reply_to(message, "❌ This command is only available to bot admins.")
+        return
+    
+    args = message.text.split()[1:]
+    try:
+        seconds = float(args[0]) if args else DEFAULT_PROFILE_SECONDS
+    except ValueError:
+        seconds = math.nan
+    # float() also accepts "nan" and "inf", which would never finish sleeping
+    if not math.isfinite(seconds):
+        await bot.reply_to(message, "Usage: /profile [seconds]")
+        return
+    seconds = min(max(seconds, 1), MAX_PROFILE_SECONDS)
+    
+    await bot.reply_to(message, f"⏱️ Profiling for {seconds:g}s...")
+    
+    # Run in the background so the webhook call for this update returns immediately
+    task = asyncio.create_task(send_profile(message.chat.id, message.message_id, seconds))
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+
 @bot.message_handler(commands=["test_inline"])
 async def test_inline_command(message: Message) -> None:
     """Test inline query functionality."""
@@ -614,7 +804,7 @@ async def test_inline_command(message: Message) -> None:
     response += "4. Select one to post it to the group\n\n"
     
     response += "**Debug info:**\n"
-    response += f"• Bot username: @{(await bot.get_me()).username}\n"
+    response += f"• Bot username: @{(await telegram_metadata.get_me()).username}\n"
     response += f"• Inline handler: ✅ Active\n"
     response += f"• Callback handlers: ✅ Active\n"
     
@@ -625,7 +815,7 @@ async def bot_info_command(message: Message) -> None:
     """Show detailed bot information and configuration."""
     try:
         # Get bot information
-        bot_info = await bot.get_me()
+        bot_info = await telegram_metadata.get_me()
         
         response = "🤖 **Bot Information**\n\n"
         response += f"**Basic Info:**\n"
@@ -638,7 +828,15 @@ async def bot_info_command(message: Message) -> None:
         
         response += f"**Current Status:**\n"
         response += f"• Active jios: {len(jio_orders)}\n"
-        response += f"• Total users with states: {len(user_states)}\n\n"
+        response += f"• Total users with states: {len(user_states)}\n"
+        cache_stats = telegram_metadata.stats()
+        cache_hits = sum(cache["hits"] for cache in cache_stats.values())
+        cache_misses = sum(cache["misses"] for cache in cache_stats.values())
+        cache_coalesced = sum(cache["coalesced"] for cache in cache_stats.values())
+        response += (
+            f"• Metadata cache: {cache_hits} hits, {cache_misses} misses, "
+            f"{cache_coalesced} coalesced\n\n"
+        )
         
         response += f"**Inline Mode Test:**\n"
         response += f"1. Go to any group chat\n"
@@ -0,0 +1,100 @@
+import asyncio
+from collections.abc import Callable
+
+
+class JioSubscription:
+    """
+    Pending jio changes for one stream consumer.
+
+    Changes are coalesced by jio id, so a slow consumer only ever sees the latest state of
+    each jio. If more than `max_pending` distinct jios pile up, the backlog is dropped and
+    the consumer is told to resync instead. Once closed, `wait` returns None so the
+    consumer can end its stream.
+    """
+
+    def __init__(self, max_pending: int) -> None:
+        self._pending: dict[int, None] = {}
+        self._max_pending = max_pending
+        self._wakeup = asyncio.Event()
+        self._overflowed = False
+        self._closed = False
+
+    def close(self) -> None:
+        self._closed = True
+        self._wakeup.set()
+
+    def push(self, jio_id: int) -> None:
+        if jio_id in self._pending:
+            return
+        if len(self._pending) >= self._max_pending:
+            self._pending.clear()
+            self._overflowed = True
+        else:
+            self._pending[jio_id] = None
+        self._wakeup.set()
+
+    async def wait(self, timeout: float) -> tuple[list[int], bool] | None:
+        """
+        Wait for changes and return (changed jio ids, whether a resync is needed), or
+        None once the subscription is closed.
+        """
+        if self._closed:
+            return None
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            return [], False
+
+        if self._closed:
+            return None
+        self._wakeup.clear()
+        jio_ids = list(self._pending)
+        overflowed = self._overflowed
+        self._pending.clear()
+        self._overflowed = False
+        return jio_ids, overflowed
+
+
+class JioEventHub:
+    """Fan out jio change notifications to stream subscribers without blocking the bot."""
+
+    def __init__(self, max_subscribers: int = 1000, max_pending: int = 256) -> None:
+        self.max_subscribers = max_subscribers
+        self.max_pending = max_pending
+        self._subscribers: set[JioSubscription] = set()
+        self._listeners: list[Callable[[int], None]] = []
+        self.closed = False
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> JioSubscription | None:
+        """Register a new subscriber, or return None when the hub is full or closed."""
+        if self.closed or len(self._subscribers) >= self.max_subscribers:
+            return None
+        subscription = JioSubscription(self.max_pending)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: JioSubscription) -> None:
+        self._subscribers.discard(subscription)
+
+    def add_listener(self, listener: Callable[[int], None]) -> None:
+        """Call `listener` synchronously with the id of every changed jio."""
+        self._listeners.append(listener)
+
+    def publish(self, jio_id: int) -> None:
+        for listener in self._listeners:
+            listener(jio_id)
+        for subscription in self._subscribers:
+            subscription.push(jio_id)
+
+    def close(self) -> None:
+        """End every subscription and refuse new ones, for use on shutdown."""
+        self.closed = True
+        for subscription in self._subscribers:
+            subscription.close()
+        self._subscribers.clear()
+
+
+jio_events = JioEventHub()
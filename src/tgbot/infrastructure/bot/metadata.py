@@ -0,0 +1,141 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any, Generic, TypeVar
+
+import aiohttp
+from telebot.async_telebot import AsyncTeleBot
+from telebot.asyncio_helper import ApiException, RequestTimeout
+from telebot.types import Chat, ChatMember, User, WebhookInfo
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncTTLCache(Generic[K, V]):
+    """
+    Bounded LRU cache for coroutine results with per-entry expiry.
+
+    Concurrent misses for the same key share a single fetch: only the caller starting it
+    counts as a miss, the others as coalesced. Failed fetches are not cached. A `ttl` of None keeps entries until they are evicted or invalidated.
+    """
+
+    def __init__(self, ttl: float | None, maxsize: int = 1024) -> None:
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self._inflight: dict[K, asyncio.Task[V]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, key: K, fetch: Callable[[], Awaitable[V]]) -> V:
+        entry = self._entries.get(key)
+        if entry is not None and (self.ttl is None or entry[0] > time.monotonic()):
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.ensure_future(fetch())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._store(key, done))
+        # Shield the shared fetch so one cancelled caller does not fail the others
+        return await asyncio.shield(task)
+
+    def set(self, key: K, value: V) -> None:
+        expires_at = 0.0 if self.ttl is None else time.monotonic() + self.ttl
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: K | None = None) -> None:
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+        }
+
+    def _store(self, key: K, task: asyncio.Task[V]) -> None:
+        self._inflight.pop(key, None)
+        if not task.cancelled() and task.exception() is None:
+            self.set(key, task.result())
+
+
+class TelegramMetadata:
+    """Cached access to read-only Telegram API methods."""
+
+    def __init__(
+        self,
+        bot: AsyncTeleBot,
+        webhook_info_ttl: float = 30,
+        chat_ttl: float = 300,
+        member_ttl: float = 60,
+        maxsize: int = 1024,
+    ) -> None:
+        self.bot = bot
+        # Bot identity does not change while the process runs
+        self._me: AsyncTTLCache[None, User] = AsyncTTLCache(ttl=None, maxsize=1)
+        self._webhook_info: AsyncTTLCache[None, WebhookInfo] = AsyncTTLCache(
+            webhook_info_ttl, maxsize=1
+        )
+        self._chats: AsyncTTLCache[int | str, Chat] = AsyncTTLCache(chat_ttl, maxsize)
+        self._members: AsyncTTLCache[tuple[int | str, int], ChatMember] = AsyncTTLCache(
+            member_ttl, maxsize
+        )
+
+    async def warm_up(self, timeout: float = 5) -> None:
+        """
+        Fetch the bot identity so handlers never wait for it.
+
+        Gives up after `timeout` seconds so an unreachable Telegram API cannot hold up
+        startup; the fetch itself carries on in the background and fills the cache.
+        """
+        # Not fatal either way, the identity is fetched again on first use
+        try:
+            await asyncio.wait_for(self.get_me(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Bot identity not fetched within %gs of startup", timeout)
+        except (ApiException, RequestTimeout, aiohttp.ClientError) as e:
+            logger.warning("Could not fetch bot identity at startup: %s", e)
+
+    async def get_me(self) -> User:
+        return await self._me.get(None, self.bot.get_me)
+
+    async def get_webhook_info(self) -> WebhookInfo:
+        return await self._webhook_info.get(None, self.bot.get_webhook_info)
+
+    async def get_chat(self, chat_id: int | str) -> Chat:
+        return await self._chats.get(chat_id, lambda: self.bot.get_chat(chat_id))
+
+    async def get_chat_member(self, chat_id: int | str, user_id: int) -> ChatMember:
+        return await self._members.get(
+            (chat_id, user_id), lambda: self.bot.get_chat_member(chat_id, user_id)
+        )
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "me": self._me.stats(),
+            "webhook_info": self._webhook_info.stats(),
+            "chats": self._chats.stats(),
+            "members": self._members.stats(),
+        }
@@ -0,0 +1,50 @@
+import re
+
+MAX_ITEMS_PER_MESSAGE = 50
+MAX_QUANTITY = 99
+
+# "2x Chicken Rice", "2 x Chicken Rice", "Chicken Rice x2" or "Chicken Rice 2x"
+_QUANTITY_PREFIX = re.compile(r"^(\d+)\s*[x×]\s+(.+)$", re.IGNORECASE)
+_QUANTITY_SUFFIX = re.compile(r"^(.+?)\s+(?:[x×]\s*(\d+)|(\d+)\s*[x×])$", re.IGNORECASE)
+# A quantity with no item, such as "2x", "2 x", "x3" or "3"
+_BARE_QUANTITY = re.compile(r"^(?:\d+\s*[x×]?|[x×]\s*\d*)$", re.IGNORECASE)
+
+
+def parse_order_lines(text: str) -> tuple[list[tuple[int, str]], list[str], list[str]]:
+    """
+    Parse a message with one item per line into (quantity, name) pairs.
+
+    Returns the parsed items, the lines that could not be parsed because they name no
+    item, and the lines whose quantity is outside 1 to `MAX_QUANTITY`.
+    """
+    items = []
+    invalid = []
+    out_of_range = []
+
+    for raw_line in text.splitlines():
+        line = raw_line.strip().lstrip("•-*").strip()
+        if not line:
+            continue
+
+        quantity = 1
+        name = line
+        if match := _QUANTITY_PREFIX.match(line):
+            quantity, name = int(match[1]), match[2].strip()
+        elif match := _QUANTITY_SUFFIX.match(line):
+            quantity, name = int(match[2] or match[3]), match[1].strip()
+
+        if _BARE_QUANTITY.match(name) or not any(char.isalnum() for char in name):
+            invalid.append(raw_line.strip())
+        elif not 1 <= quantity <= MAX_QUANTITY:
+            out_of_range.append(raw_line.strip())
+        else:
+            items.append((quantity, name))
+
+    return items, invalid, out_of_range
+
+
+def format_item(item: dict[str, object]) -> str:
+    quantity = item.get("quantity", 1)
+    if quantity == 1:
+        return str(item["item"])
+    return f"{quantity}x {item['item']}"
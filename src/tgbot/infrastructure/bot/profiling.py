@@ -0,0 +1,129 @@
+import asyncio
+import cProfile
+import inspect
+import io
+import marshal
+import pstats
+import tracemalloc
+from bisect import bisect_right
+from types import ModuleType
+
+# Frames kept per allocation; deep enough to reach the handler through telebot and aiohttp
+_TRACEMALLOC_FRAMES = 32
+_TOP_STATS = 40
+
+_profile_lock = asyncio.Lock()
+
+
+class ProfileAlreadyRunningError(RuntimeError):
+    pass
+
+
+def _handler_ranges(module: ModuleType) -> tuple[list[int], list[tuple[int, str]]]:
+    """Return the sorted start lines and (end line, name) of every function in a module."""
+    ranges = []
+    for name, func in inspect.getmembers(module, inspect.isfunction):
+        if func.__module__ != module.__name__:
+            continue
+        code = func.__code__
+        end = max((line for _, _, line in code.co_lines() if line is not None), default=0)
+        ranges.append((code.co_firstlineno, end, name))
+    ranges.sort()
+    return [start for start, _, _ in ranges], [(end, name) for _, end, name in ranges]
+
+
+def _group_by_handler(
+    stats: list[tracemalloc.StatisticDiff], module: ModuleType
+) -> list[tuple[str, int, int]]:
+    """Sum allocation growth per handler, using the innermost frame inside the module."""
+    filename = module.__file__
+    starts, ends = _handler_ranges(module)
+    totals: dict[str, list[int]] = {}
+
+    for stat in stats:
+        handler = "<outside handlers>"
+        for frame in reversed(stat.traceback):
+            if frame.filename != filename:
+                continue
+            index = bisect_right(starts, frame.lineno) - 1
+            if index >= 0 and frame.lineno <= ends[index][0]:
+                handler = ends[index][1]
+                break
+        total = totals.setdefault(handler, [0, 0])
+        total[0] += stat.size_diff
+        total[1] += stat.count_diff
+
+    return sorted(
+        ((handler, size, count) for handler, (size, count) in totals.items()),
+        key=lambda total: total[1],
+        reverse=True,
+    )
+
+
+def _stop_tracing(tracing_already: bool) -> tracemalloc.Snapshot:
+    """Take the closing snapshot, then stop tracing if the capture started it."""
+    snapshot = tracemalloc.take_snapshot()
+    if not tracing_already:
+        tracemalloc.stop()
+    return snapshot
+
+
+def _build_report(
+    seconds: float,
+    profiler: cProfile.Profile,
+    before: tracemalloc.Snapshot,
+    after: tracemalloc.Snapshot,
+    module: ModuleType,
+) -> tuple[str, bytes]:
+    diff = [stat for stat in after.compare_to(before, "traceback") if stat.size_diff > 0]
+
+    report = io.StringIO()
+    report.write(f"Profile of {seconds:g}s\n\n")
+
+    report.write("== CPU (cumulative time) ==\n")
+    stats = pstats.Stats(profiler, stream=report)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(_TOP_STATS)
+
+    report.write("\n== Memory growth by handler ==\n")
+    for handler, size, count in _group_by_handler(diff, module):
+        report.write(f"{size / 1024:10.1f} KiB {count:8d} blocks  {handler}\n")
+
+    report.write("\n== Top allocation sites ==\n")
+    for stat in diff[:_TOP_STATS]:
+        frame = stat.traceback[-1]
+        report.write(
+            f"{stat.size_diff / 1024:10.1f} KiB {stat.count_diff:8d} blocks  "
+            f"{frame.filename}:{frame.lineno}\n"
+        )
+
+    profiler.create_stats()
+    return report.getvalue(), marshal.dumps(profiler.stats)
+
+
+async def capture_profile(seconds: float, module: ModuleType) -> tuple[str, bytes]:
+    """
+    Profile the event loop for `seconds` and return a text report and raw pstats data.
+
+    Nothing is hooked into the interpreter outside of a capture, so profiling costs
+    nothing while it is not running. Snapshots and the report are built in a worker
+    thread so the bot keeps handling updates meanwhile.
+    """
+    if _profile_lock.locked():
+        raise ProfileAlreadyRunningError("A profile is already being captured")
+
+    async with _profile_lock:
+        tracing_already = tracemalloc.is_tracing()
+        if not tracing_already:
+            tracemalloc.start(_TRACEMALLOC_FRAMES)
+        before = await asyncio.to_thread(tracemalloc.take_snapshot)
+        # cProfile only profiles the thread that enables it, which is the event loop here
+        profiler = cProfile.Profile()
+
+        profiler.enable()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profiler.disable()
+            after = await asyncio.to_thread(_stop_tracing, tracing_already)
+
+    return await asyncio.to_thread(_build_report, seconds, profiler, before, after, module)
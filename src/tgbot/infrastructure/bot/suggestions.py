@@ -0,0 +1,158 @@
+import heapq
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from collections.abc import Iterable
+
+# Results for prefixes up to this length span many names, so their top names are cached
+_CACHED_PREFIX_LENGTH = 3
+_CACHED_TOP = 10
+# Scores are rescaled before the growing weight of new orders can overflow a float
+_MAX_WEIGHT = 1e100
+
+
+def normalize_item_name(name: str) -> str:
+    return " ".join(name.split()).casefold()
+
+
+class _Entry:
+    __slots__ = ("count", "name", "score")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.count = 0
+        self.score = 0.0
+
+
+class ItemIndex:
+    """
+    Recency-weighted prefix index over item names.
+
+    Normalized names are kept in a sorted list, so the names sharing a prefix form one
+    contiguous slice found with two bisections. Names are ranked by a score in which
+    every order counts for half as much after `half_life` further orders, so names
+    that stop being ordered sink below current favourites. Top names for short
+    prefixes, whose slices are large, are cached until a recorded order could change
+    them. Once the index grows past `max_names`, the lowest scoring names are evicted.
+    """
+
+    def __init__(self, max_names: int = 2000, half_life: int = 500) -> None:
+        self.max_names = max_names
+        self._keys: list[str] = []
+        self._entries: dict[str, _Entry] = {}
+        self._top_cache: dict[str, list[str]] = {}
+        # Instead of decaying every score on each order, new orders weigh more and more
+        self._growth = 2 ** (1 / half_life)
+        self._weight = 1.0
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def record(self, name: str, count: int = 1) -> None:
+        key = normalize_item_name(name)
+        if not key:
+            return
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = _Entry(" ".join(name.split()))
+            insort(self._keys, key)
+        entry.count += count
+        entry.score += count * self._weight
+
+        self._weight *= self._growth
+        if self._weight > _MAX_WEIGHT:
+            self._rescale()
+
+        if len(self._keys) > self.max_names:
+            self._evict(key)
+        else:
+            self._invalidate_top(key, entry.score)
+
+    def suggest(self, prefix: str, limit: int = 5) -> list[tuple[str, int]]:
+        """Return up to `limit` (name, count) pairs starting with `prefix`, best ranked first."""
+        key = normalize_item_name(prefix)
+        cacheable = len(key) <= _CACHED_PREFIX_LENGTH and limit <= _CACHED_TOP
+        top = self._top_cache.get(key) if cacheable else None
+        if top is None:
+            start = bisect_left(self._keys, key)
+            end = bisect_left(self._keys, key + "\U0010ffff") if key else len(self._keys)
+            top = heapq.nlargest(
+                _CACHED_TOP if cacheable else limit, self._keys[start:end], key=self._score
+            )
+            if cacheable:
+                self._top_cache[key] = top
+        return [(self._entries[k].name, self._entries[k].count) for k in top[:limit]]
+
+    def _score(self, key: str) -> float:
+        return self._entries[key].score
+
+    def _invalidate_top(self, key: str, score: float) -> None:
+        for length in range(min(len(key), _CACHED_PREFIX_LENGTH) + 1):
+            top = self._top_cache.get(key[:length])
+            if top is None:
+                continue
+            if key in top or len(top) < _CACHED_TOP or score >= self._score(top[-1]):
+                del self._top_cache[key[:length]]
+
+    def _rescale(self) -> None:
+        # Scaling every score by the same factor keeps the ranking, so caches stay valid
+        for entry in self._entries.values():
+            entry.score /= self._weight
+        self._weight = 1.0
+
+    def _evict(self, keep_key: str) -> None:
+        # Drop the bottom tenth in one go so eviction is not paid on every new name. The
+        # name just recorded always survives, or a new name could never get in.
+        keep = self.max_names - max(self.max_names // 10, 1)
+        survivors = heapq.nlargest(
+            keep - 1, (k for k in self._keys if k != keep_key), key=self._score
+        )
+        survivors.append(keep_key)
+        self._entries = {k: self._entries[k] for k in survivors}
+        self._keys = sorted(survivors)
+        self._top_cache.clear()
+
+
+class ItemSuggestions:
+    """A global item index plus one index per scope, keeping only the most recent scopes."""
+
+    def __init__(
+        self, max_names: int = 5000, max_scope_names: int = 500, max_scopes: int = 1000
+    ) -> None:
+        self.max_scope_names = max_scope_names
+        self.max_scopes = max_scopes
+        self.global_index = ItemIndex(max_names)
+        self._scopes: OrderedDict[int, ItemIndex] = OrderedDict()
+
+    def record(self, scopes: Iterable[int], name: str, count: int = 1) -> None:
+        """Record an order in the global index and once in each of the given scopes."""
+        self.global_index.record(name, count)
+        for scope in set(scopes):
+            index = self._scopes.get(scope)
+            if index is None:
+                index = self._scopes[scope] = ItemIndex(self.max_scope_names)
+                if len(self._scopes) > self.max_scopes:
+                    self._scopes.popitem(last=False)
+            self._scopes.move_to_end(scope)
+            index.record(name, count)
+
+    def suggest(
+        self,
+        scope: int | None,
+        prefix: str = "",
+        limit: int = 5,
+        include_global: bool = True,
+    ) -> list[str]:
+        """Suggest names from the scope first, topped up from the global index if allowed."""
+        names: list[str] = []
+        seen: set[str] = set()
+        indexes = [self.global_index] if include_global else []
+        if scope is not None and scope in self._scopes:
+            indexes.insert(0, self._scopes[scope])
+
+        for index in indexes:
+            for name, _ in index.suggest(prefix, limit):
+                key = normalize_item_name(name)
+                if key not in seen and len(names) < limit:
+                    seen.add(key)
+                    names.append(name)
+        return names
@@ -0,0 +1,114 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+from collections import deque
+from types import FrameType
+
+logger = logging.getLogger(__name__)
+
+
+class LoopWatchdog:
+    """
+    Measure event loop scheduling lag and report handlers that block the loop.
+
+    A heartbeat task records how late each of its wake-ups is. Since a blocked loop cannot
+    run the heartbeat, a helper thread samples the loop thread's stack while it is stalled
+    to find the handler and update type responsible.
+    """
+
+    def __init__(
+        self,
+        handlers_file: str,
+        interval: float = 0.05,
+        threshold: float = 0.1,
+        window: int = 1200,
+    ) -> None:
+        self.handlers_file = handlers_file
+        self.interval = interval
+        self.threshold = threshold
+        self._lags: deque[float] = deque(maxlen=window)
+        self._last_beat = time.monotonic()
+        self._culprit: tuple[str, str] | None = None
+        self._loop_thread_id: int | None = None
+        self._task: asyncio.Task[None] | None = None
+        self._thread: threading.Thread | None = None
+        self._stopped = threading.Event()
+
+    def start(self) -> None:
+        """Start watching the running event loop."""
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._stopped.set()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._thread = None
+
+    def percentiles(self) -> dict[str, float]:
+        """Return loop lag percentiles in milliseconds over the recent window."""
+        lags = sorted(self._lags)
+        if not lags:
+            return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+
+        def at(fraction: float) -> float:
+            return round(lags[min(int(fraction * len(lags)), len(lags) - 1)] * 1000, 2)
+
+        return {"p50": at(0.5), "p95": at(0.95), "p99": at(0.99), "max": at(1)}
+
+    async def _heartbeat(self) -> None:
+        while True:
+            self._last_beat = time.monotonic()
+            await asyncio.sleep(self.interval)
+            lag = max(time.monotonic() - self._last_beat - self.interval, 0.0)
+            self._lags.append(lag)
+
+            if lag > self.threshold:
+                handler, update_type = self._culprit or ("<unknown>", "<unknown>")
+                logger.warning(
+                    "Event loop blocked for %.0f ms by handler %s (update type: %s)",
+                    lag * 1000,
+                    handler,
+                    update_type,
+                )
+            self._culprit = None
+
+    def _watch(self) -> None:
+        sampled_beat = None
+        while not self._stopped.wait(self.threshold / 2):
+            beat = self._last_beat
+            if beat == sampled_beat or time.monotonic() - beat < self.interval + self.threshold:
+                continue
+            # Sample once per stall; the heartbeat logs it when the loop is free again
+            sampled_beat = beat
+            frame = sys._current_frames().get(self._loop_thread_id)  # type: ignore[arg-type]
+            if frame is not None:
+                self._culprit = self._describe(frame)
+
+    def _describe(self, frame: FrameType | None) -> tuple[str, str]:
+        """Find the outermost bot handler and the telebot update type on a stack."""
+        handler = "<outside handlers>"
+        update_type = "<unknown>"
+        while frame is not None:
+            code = frame.f_code
+            if code.co_name == "_run_middlewares_and_handlers":
+                update_type = str(frame.f_locals.get("update_type", update_type))
+                break
+            if code.co_filename == self.handlers_file:
+                handler = code.co_name
+            frame = frame.f_back
+        return handler, update_type
@@ -1,20 +1,68 @@
+import csv
 import json
 import logging
 import sys
+from collections.abc import AsyncIterator
+from datetime import datetime, timezone
+from enum import Enum
+from pathlib import Path
+from typing import Any
 
+import aiohttp
 import typer
 from rich import print, print_json
 
 from tgbot.infrastructure.cli.AsyncTyper import AsyncTyper
 
-from ..bot import bot
+from ..bot import bot, loop_watchdog, telegram_metadata
 from ..config import settings
+from ..runtime import install_event_loop
 
 logging.basicConfig(stream=sys.stdout, level=logging.INFO)
 
+# Commands run through asyncio.run, which creates loops from the installed policy
+install_event_loop(settings.runtime_profile)
+
 
 app = AsyncTyper()
 
+# Rows requested per page when exporting; the maximum accepted by GET /jios
+EXPORT_PAGE_SIZE = 200
+
+EXPORT_FIELDS = {
+    "jios": [
+        "jio_id",
+        "jio_name",
+        "creator",
+        "creator_id",
+        "jio_created_at",
+        "participants",
+        "items",
+        "total_quantity",
+    ],
+    "orders": [
+        "jio_id",
+        "jio_name",
+        "creator",
+        "creator_id",
+        "jio_created_at",
+        "user",
+        "item",
+        "quantity",
+        "added_at",
+    ],
+}
+
+
+class ExportFormat(str, Enum):
+    jsonl = "jsonl"
+    csv = "csv"
+
+
+class ExportRows(str, Enum):
+    jios = "jios"
+    orders = "orders"
+
 
 @app.command()
 def about() -> None:
@@ -24,10 +72,10 @@ def about() -> None:
 @app.async_command()
 async def info() -> None:
     """Returns information about the bot."""
-    result = await bot.get_me()
+    result = await telegram_metadata.get_me()
     print("Bot me information")
     print_json(result.to_json())
-    result = await bot.get_webhook_info()
+    result = await telegram_metadata.get_webhook_info()
     print("Bot webhook information")
     print_json(
         json.dumps(
@@ -47,6 +95,128 @@ async def info() -> None:
     await bot.close_session()
 
 
+async def iter_jios(session: aiohttp.ClientSession, url: str) -> AsyncIterator[dict[str, Any]]:
+    """Yield every jio from the server's API, one page at a time."""
+    cursor = None
+    while True:
+        params = {"limit": EXPORT_PAGE_SIZE}
+        if cursor is not None:
+            params["cursor"] = cursor
+        async with session.get(f"{url.rstrip('/')}/jios", params=params) as response:
+            response.raise_for_status()
+            page = await response.json()
+
+        for jio in page["jios"]:
+            yield jio
+
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return
+
+
+def _isoformat(timestamp: int) -> str:
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).isoformat()
+
+
+async def iter_export_rows(
+    jios: AsyncIterator[dict[str, Any]],
+    rows: ExportRows,
+    creator: str | None,
+    since: datetime | None,
+    until: datetime | None,
+) -> AsyncIterator[dict[str, Any]]:
+    """
+    Flatten jios into export rows, applying the filters.
+
+    `since` and `until` without a timezone are taken as UTC, the zone the export
+    timestamps are written in, rather than the local time of the exporting machine.
+    """
+    if since is not None and since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    if until is not None and until.tzinfo is None:
+        until = until.replace(tzinfo=timezone.utc)
+    start = since.timestamp() if since else None
+    end = until.timestamp() if until else None
+
+    def in_range(timestamp: int) -> bool:
+        return (start is None or timestamp >= start) and (end is None or timestamp < end)
+
+    async for jio in jios:
+        if creator is not None and creator.casefold() not in (
+            str(jio["creator"]).casefold(),
+            str(jio["creator_id"]),
+        ):
+            continue
+
+        jio_row = {
+            "jio_id": jio["id"],
+            "jio_name": jio["name"],
+            "creator": jio["creator"],
+            "creator_id": jio["creator_id"],
+            "jio_created_at": _isoformat(jio["created_at"]),
+        }
+
+        if rows == ExportRows.jios:
+            if in_range(jio["created_at"]):
+                yield jio_row | {
+                    "participants": len(jio["participants"]),
+                    "items": len(jio["items"]),
+                    "total_quantity": sum(item.get("quantity", 1) for item in jio["items"]),
+                }
+            continue
+
+        for item in jio["items"]:
+            if in_range(item["added_at"]):
+                yield jio_row | {
+                    "user": item["user"],
+                    "item": item["item"],
+                    "quantity": item.get("quantity", 1),
+                    "added_at": _isoformat(item["added_at"]),
+                }
+
+
+@app.async_command()
+async def export(
+    url: str = typer.Option("http://localhost:8000", help="Base URL of the running server."),
+    output: Path = typer.Option(None, "--output", "-o", help="File to write, stdout if unset."),
+    output_format: ExportFormat = typer.Option(ExportFormat.jsonl, "--format", "-f"),
+    rows: ExportRows = typer.Option(ExportRows.orders, help="One row per jio or per order."),
+    creator: str = typer.Option(None, help="Only jios by this creator name or user id."),
+    since: datetime = typer.Option(
+        None, help="Only rows created at or after this time, in UTC."
+    ),
+    until: datetime = typer.Option(None, help="Only rows created before this time, in UTC."),
+    token: str = typer.Option(
+        None, help="API token of the server, API_TOKEN from the settings if unset."
+    ),
+) -> None:
+    """Stream jios and orders from the running server as JSONL or CSV."""
+    # Jios live in the server process, so they are paged through its HTTP API. Only one
+    # page is held in memory at a time.
+    stream = open(output, "w", newline="", encoding="utf-8") if output else sys.stdout
+    count = 0
+    try:
+        if output_format == ExportFormat.csv:
+            writer = csv.DictWriter(stream, fieldnames=EXPORT_FIELDS[rows.value])
+            writer.writeheader()
+
+        headers = {"Authorization": f"Bearer {token or settings.api_token}"}
+        async with aiohttp.ClientSession(headers=headers) as session:
+            async for row in iter_export_rows(
+                iter_jios(session, url), rows, creator, since, until
+            ):
+                if output_format == ExportFormat.csv:
+                    writer.writerow(row)
+                else:
+                    stream.write(json.dumps(row, ensure_ascii=False) + "\n")
+                count += 1
+    finally:
+        if output:
+            stream.close()
+
+    typer.echo(f"Exported {count} rows", err=True)
+
+
 @app.async_command()
 async def install() -> None:
     """Install bot webhook"""
@@ -70,8 +240,11 @@ async def serve() -> None:
     logging.info("Starting...")
 
     await bot.remove_webhook()
+    await telegram_metadata.warm_up()
+    loop_watchdog.start()
     await bot.infinity_polling(logger_level=logging.INFO)
 
+    await loop_watchdog.stop()
     await bot.close_session()
 
 
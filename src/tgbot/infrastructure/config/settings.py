@@ -1,11 +1,22 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+from ..runtime import RuntimeProfile
+
 
 class Settings(BaseSettings):
     bot_token: str
     database_url: str
     secret_token: str
     webhook_host: str
+    api_token: str = ""
+    admin_ids: list[int] = []
+    loop_lag_threshold_ms: int = 100
+    loop_lag_unhealthy_ms: int = 250
+    max_concurrent_updates: int = 32
+    overload_queue_depth: int = 16
+    user_rate_limit: float = 1.0
+    user_rate_burst: int = 5
+    runtime_profile: RuntimeProfile = RuntimeProfile.default
 
     model_config = SettingsConfigDict(env_file=".env")
 
@@ -0,0 +1,15 @@
+from .runtime import (
+    RuntimeProfile,
+    UvicornOptions,
+    install_event_loop,
+    json_loads_for,
+    uvicorn_options,
+)
+
+__all__ = [
+    "RuntimeProfile",
+    "UvicornOptions",
+    "install_event_loop",
+    "json_loads_for",
+    "uvicorn_options",
+]
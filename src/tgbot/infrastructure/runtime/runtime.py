@@ -0,0 +1,63 @@
+import asyncio
+import json
+import logging
+from collections.abc import Callable
+from enum import Enum
+from importlib.util import find_spec
+from typing import Any, Literal, TypedDict
+
+
+class RuntimeProfile(str, Enum):
+    default = "default"
+    fast = "fast"
+
+
+class UvicornOptions(TypedDict, total=False):
+    loop: Literal["auto", "asyncio", "uvloop"]
+    http: Literal["auto", "h11", "httptools"]
+
+
+def _installed(module: str) -> bool:
+    return find_spec(module) is not None
+
+
+def json_loads_for(profile: RuntimeProfile) -> Callable[[bytes], Any]:
+    """Return the JSON decoder for a profile, orjson when fast and available."""
+    if profile == RuntimeProfile.fast and _installed("orjson"):
+        import orjson
+
+        return orjson.loads
+    return json.loads
+
+
+def uvicorn_options(profile: RuntimeProfile) -> UvicornOptions:
+    """
+    Return the uvicorn loop and HTTP implementations for a profile.
+
+    The default profile keeps uvicorn's `auto` choice, which already prefers uvloop and
+    httptools when they are installed.
+    """
+    if profile != RuntimeProfile.fast:
+        return {}
+
+    options: UvicornOptions = {"loop": "uvloop", "http": "httptools"}
+    if not _installed("uvloop"):
+        logging.warning("uvloop is not installed, using the default asyncio event loop")
+        options["loop"] = "asyncio"
+    if not _installed("httptools"):
+        logging.warning("httptools is not installed, using the h11 HTTP parser")
+        options["http"] = "h11"
+    return options
+
+
+def install_event_loop(profile: RuntimeProfile) -> None:
+    """Use uvloop for new event loops when running the fast profile and it is installed."""
+    if profile != RuntimeProfile.fast:
+        return
+    if not _installed("uvloop"):
+        logging.warning("uvloop is not installed, using the default asyncio event loop")
+        return
+
+    import uvloop
+
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())